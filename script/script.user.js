@@ -14,6 +14,55 @@
 
 
 SERVER="http://127.0.0.1:5000/api"
+// "overlay" draws the translated text over the original image, "image" swaps in a translated image from the server
+MODE="overlay"
+
+
+function drawOverlay(img, container, result) {
+  // one overlay per image, translating again replaces it
+  const previous = container.querySelector(".translate-overlay")
+  if (previous) {
+    previous.resizeObserver.disconnect()
+    previous.remove()
+  }
+
+  // sits exactly over the image, boxes use percentages of the original size so they follow resizes
+  const overlay = document.createElement("div")
+  overlay.className = "translate-overlay absolute pointer-events-none"
+  overlay.style.left = `${img.offsetLeft}px`
+  overlay.style.top = `${img.offsetTop}px`
+  overlay.style.width = `${img.clientWidth}px`
+  overlay.style.height = `${img.clientHeight}px`
+  overlay.style.containerType = "size"
+
+  // keep the overlay on the image if the page layout changes its size
+  overlay.resizeObserver = new ResizeObserver(() => {
+    overlay.style.left = `${img.offsetLeft}px`
+    overlay.style.top = `${img.offsetTop}px`
+    overlay.style.width = `${img.clientWidth}px`
+    overlay.style.height = `${img.clientHeight}px`
+  }).observe(img)
+
+  for (const item of result.boxes) {
+    const [x1, y1, x2, y2] = item.box
+
+    const box = document.createElement("div")
+    box.className = "absolute flex items-center justify-center text-center leading-tight"
+    box.style.left = `${x1 / result.width * 100}%`
+    box.style.top = `${y1 / result.height * 100}%`
+    box.style.width = `${(x2 - x1) / result.width * 100}%`
+    box.style.height = `${(y2 - y1) / result.height * 100}%`
+    box.style.backgroundColor = item.background
+    box.style.color = item.fill
+    // 25px on the original image, scaled with the displayed height
+    box.style.fontSize = `max(10px, ${25 / result.height * 100}cqh)`
+    box.innerText = item.text
+
+    overlay.appendChild(box)
+  }
+
+  container.appendChild(overlay)
+}
 
 
 images = $("img")
@@ -37,11 +86,13 @@ for (img of images) {
 
     translateButton.innerText = "Loading"
 
-    $.getJSON(`${SERVER}/translate?callback=?&url=${img.src}`, function(result) {
-      console.log("Returned", result.url)
+    $.getJSON(`${SERVER}/translate?callback=?&mode=${MODE}&priority=interactive&url=${img.src}`, function(result) {
+      console.log("Returned", result)
 
       if (result.error) {
         console.log("Error:", result.error)
+      } else if (MODE == "overlay") {
+        drawOverlay(img, d, result)
       } else {
         img.src = result.url
       }
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import asyncio
+import threading
+
+class TranslationBackend():
+  """Translates a list of strings, one result per input in the same order"""
+
+  name = "base"
+
+  @property
+  def cachePrefix(self) -> str:
+    # Prepended to translate cache keys so results from different engines don't mix
+    return f"{self.name}-"
+
+  async def translateBulk(self, untranslated: list[str]) -> list[str]:
+    raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+  """Online translation through googletrans"""
+
+  name = "google"
+
+  def __init__(self):
+    from googletrans import Translator
+    self.translator = Translator()
+
+  @property
+  def cachePrefix(self) -> str:
+    # Empty so caches written before backends existed still hit
+    return ""
+
+  async def translateBulk(self, untranslated: list[str]) -> list[str]:
+    if not untranslated:
+      return []
+    return [t.text for t in (await self.translator.translate(untranslated))]
+
+
+class LocalBackend(TranslationBackend):
+  """Offline translation with a transformers seq2seq model, batched and with an in-memory cache"""
+
+  name = "local"
+
+  def __init__(self, model="Helsinki-NLP/opus-mt-ja-en", tokenizer=None, batchSize=16, maxCacheSize=10000, maxLength=256, numBeams=4, device=None):
+    """model is a Hugging Face model name, or an already loaded model when tokenizer is also given"""
+    self.batchSize = batchSize
+    self.maxCacheSize = maxCacheSize
+    self.maxLength = maxLength
+    self.numBeams = numBeams
+
+    if tokenizer is None:
+      import torch
+      from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+      self.modelName = model
+      self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+      self.tokenizer = AutoTokenizer.from_pretrained(model)
+      self.model = AutoModelForSeq2SeqLM.from_pretrained(model).to(self.device)
+    else:
+      self.modelName = getattr(model, "name_or_path", None) or type(model).__name__
+      self.device = device or "cpu"
+      self.tokenizer = tokenizer
+      self.model = model
+
+    self.model.eval()
+
+    self.__cache: OrderedDict[str, str] = OrderedDict()
+    self.__lock = threading.Lock()
+
+  @property
+  def cachePrefix(self) -> str:
+    return f"{self.name}-{self.modelName}-"
+
+  def __translateBatch(self, texts: list[str]) -> list[str]:
+    inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+    # generate() already runs without gradients
+    outputs = self.model.generate(**inputs, max_new_tokens=self.maxLength, num_beams=self.numBeams)
+    return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+  def __remember(self, text: str, translated: str):
+    self.__cache[text] = translated
+    self.__cache.move_to_end(text)
+    if len(self.__cache) > self.maxCacheSize:
+      self.__cache.popitem(last=False)
+
+  def translateSync(self, untranslated: list[str]) -> list[str]:
+    with self.__lock:
+      results = {}
+      missing = []
+      for text in dict.fromkeys(untranslated):
+        if not text.strip():
+          results[text] = ""
+        elif text in self.__cache:
+          self.__cache.move_to_end(text)
+          results[text] = self.__cache[text]
+        else:
+          missing.append(text)
+
+      # Similar lengths in a batch means less padding
+      missing.sort(key=len)
+      for i in range(0, len(missing), self.batchSize):
+        batch = missing[i:i + self.batchSize]
+        for text, translated in zip(batch, self.__translateBatch(batch)):
+          results[text] = translated
+          self.__remember(text, translated)
+
+      return [results[text] for text in untranslated]
+
+  async def translateBulk(self, untranslated: list[str]) -> list[str]:
+    # Model inference is blocking, keep it off the event loop
+    return await asyncio.to_thread(self.translateSync, untranslated)
+
+
+BACKENDS = {
+  GoogleBackend.name: GoogleBackend,
+  LocalBackend.name: LocalBackend,
+}
+
+def createBackend(name: str, **options) -> TranslationBackend:
+  if name not in BACKENDS:
+    raise ValueError(f"Unknown translation backend {name}, expected one of {', '.join(BACKENDS)}")
+  return BACKENDS[name](**options)
+
+
+def addBackendArguments(parser):
+  """Adds the translation backend options to an argparse parser"""
+  parser.add_argument(
+    "--backend",
+    type=str,
+    choices=list(BACKENDS),
+    default="google",
+    help="Translation engine, local runs an offline model (default: google)",
+  )
+  parser.add_argument(
+    "--local-model",
+    type=str,
+    default="Helsinki-NLP/opus-mt-ja-en",
+    help="Hugging Face seq2seq model used by the local backend (default: Helsinki-NLP/opus-mt-ja-en)",
+  )
+  parser.add_argument(
+    "--translate-batch-size",
+    type=int,
+    default=16,
+    help="Number of sentences translated together by the local backend (default: 16)",
+  )
+
+
+def backendOptionsFromArgs(parser, args) -> dict:
+  """Validates the options from addBackendArguments and returns the createBackend keyword arguments"""
+  if args.translate_batch_size < 1:
+    parser.error("The translate batch size must be at least 1")
+
+  options = {"name": args.backend}
+  if args.backend == "local":
+    options["model"] = args.local_model
+    options["batchSize"] = args.translate_batch_size
+  return options
@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from PIL import Image
+from io import BytesIO
+from pathlib import Path
+import threading
+
+class SizeBudgetExceeded(Exception):
+  """Raised when an image couldn't be encoded under maxBytes, the smallest attempt is still saved"""
+
+  def __init__(self, savePath, size: int, maxBytes: int):
+    super().__init__(f"Encoded {savePath} to {size} bytes, over the {maxBytes} byte budget (saved anyway)")
+    self.savePath = savePath
+    self.size = size
+    self.maxBytes = maxBytes
+
+
+class ImageEncoder():
+  """Encodes and saves translated images on a thread pool so encoding overlaps with the next page"""
+
+  FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+    "png": ("PNG", ".png"),
+  }
+
+  def __init__(self, format="webp", quality=80, method=4, compressLevel=6, maxBytes=None, threads=2):
+    if format not in self.FORMATS:
+      raise ValueError(f"Unknown format {format}, expected one of {', '.join(self.FORMATS)}")
+
+    self.format = format
+    self.quality = quality
+    self.method = method
+    self.compressLevel = compressLevel
+    self.maxBytes = maxBytes
+
+    self.__pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="encoder")
+    # Limits how many images can wait for encoding so memory doesn't grow when encoding is the bottleneck
+    self.__slots = threading.BoundedSemaphore(threads * 2)
+
+  @property
+  def extension(self) -> str:
+    return self.FORMATS[self.format][1]
+
+  def __saveOptions(self, quality: int, compressLevel: int) -> dict:
+    if self.format == "webp":
+      return {"quality": quality, "method": self.method}
+    if self.format == "jpeg":
+      return {"quality": quality, "optimize": True}
+    return {"compress_level": compressLevel}
+
+  def __encodeOnce(self, image: Image.Image, quality: int, compressLevel: int) -> bytes:
+    out = BytesIO()
+    image.save(out, self.FORMATS[self.format][0], **self.__saveOptions(quality, compressLevel))
+    return out.getvalue()
+
+  def encode(self, image: Image.Image) -> bytes:
+    """Encodes the image, trying to get under maxBytes. The result can still be over the budget,
+    quality doesn't go below 30 and png only gets one retry at the highest compression"""
+    if self.format == "jpeg" and image.mode not in ("RGB", "L"):
+      image = image.convert("RGB")
+
+    data = self.__encodeOnce(image, self.quality, self.compressLevel)
+    if not self.maxBytes or len(data) <= self.maxBytes:
+      return data
+
+    # Over the size budget, step down quality (or up compression for png) until it fits
+    if self.format == "png":
+      if self.compressLevel < 9:
+        data = min(data, self.__encodeOnce(image, self.quality, 9), key=len)
+      return data
+
+    quality = self.quality
+    while len(data) > self.maxBytes and quality > 30:
+      quality = max(30, quality - 10)
+      data = min(data, self.__encodeOnce(image, quality, self.compressLevel), key=len)
+
+    return data
+
+  def __save(self, image: Image.Image, savePath):
+    try:
+      data = self.encode(image)
+      with open(savePath, "wb") as f:
+        f.write(data)
+      if self.maxBytes and len(data) > self.maxBytes:
+        raise SizeBudgetExceeded(savePath, len(data), self.maxBytes)
+      return Path(savePath)
+    finally:
+      self.__slots.release()
+
+  def save(self, image: Image.Image, savePath) -> Future:
+    """Queues the image to be encoded and written to savePath, blocks while too many are waiting
+
+    The future raises SizeBudgetExceeded if the written file is over maxBytes
+    """
+    self.__slots.acquire()
+    try:
+      return self.__pool.submit(self.__save, image, savePath)
+    except Exception:
+      self.__slots.release()
+      raise
+
+  def shutdown(self, wait=True):
+    self.__pool.shutdown(wait=wait)
+
+
+def addEncoderArguments(parser):
+  """Adds the output encoding options to an argparse parser"""
+  parser.add_argument(
+    "-f",
+    "--format",
+    type=str,
+    choices=list(ImageEncoder.FORMATS),
+    default="webp",
+    help="Output image format (default: webp)",
+  )
+  parser.add_argument(
+    "--quality",
+    type=int,
+    default=80,
+    help="Quality for webp/jpeg output, 1-100 (default: 80)",
+  )
+  parser.add_argument(
+    "--method",
+    type=int,
+    default=4,
+    help="WebP encoder effort, 0 (fast) to 6 (small) (default: 4)",
+  )
+  parser.add_argument(
+    "--compress-level",
+    type=int,
+    default=6,
+    help="PNG compression level, 0 (fast) to 9 (small) (default: 6)",
+  )
+  parser.add_argument(
+    "--max-bytes",
+    type=int,
+    help="Size budget per output image, quality is lowered until it fits. Images still over it are saved and reported as failed",
+  )
+  parser.add_argument(
+    "--encode-threads",
+    type=int,
+    default=2,
+    help="Number of threads used to encode output images (default: 2)",
+  )
+
+
+def encoderOptionsFromArgs(parser, args) -> dict:
+  """Validates the options from addEncoderArguments and returns the ImageEncoder keyword arguments"""
+  if not 1 <= args.quality <= 100:
+    parser.error("The quality must be between 1 and 100")
+  if not 0 <= args.method <= 6:
+    parser.error("The method must be between 0 and 6")
+  if not 0 <= args.compress_level <= 9:
+    parser.error("The compress level must be between 0 and 9")
+  if args.max_bytes is not None and args.max_bytes < 1:
+    parser.error("--max-bytes must be at least 1")
+  if args.encode_threads < 1:
+    parser.error("The number of encode threads must be at least 1")
+
+  return {
+    "format": args.format,
+    "quality": args.quality,
+    "method": args.method,
+    "compressLevel": args.compress_level,
+    "maxBytes": args.max_bytes,
+    "threads": args.encode_threads,
+  }
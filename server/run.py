@@ -1,7 +1,10 @@
 import argparse
 from pathlib import Path
-from os import listdir, path
+from os import listdir, path, scandir
 from translator import CookieTranslator
+from encoder import ImageEncoder, addEncoderArguments, encoderOptionsFromArgs
+from backends import addBackendArguments, backendOptionsFromArgs, createBackend
+from snapshot import SECTIONS, exportCache, importCache
 from PIL import Image
 from tqdm import tqdm
 from multiprocessing import Manager, Process, JoinableQueue, cpu_count, Lock, Value
@@ -10,6 +13,32 @@ import redis
 import json
 import time
 import threading
+import signal
+import resource
+import sys
+import gc
+from functools import partial
+from queue import Empty
+
+
+RECYCLE_EXIT_CODE = 3
+
+
+def currentRss():
+    """Resident memory of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        # No procfs (macOS), fall back to the peak
+        return peakRss()
+
+
+def peakRss():
+    """Peak resident memory of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KB everywhere else
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
 
 
 def createStatusBar(total, process_count):
@@ -29,6 +58,49 @@ def createStatusBar(total, process_count):
     return main_bar, status_bars
 
 
+# Strips shorter than this would cut through most speech bubbles
+MIN_STRIP_HEIGHT = 256
+
+
+def checkPageSize(img, maxPixels, oversize):
+    """Refuses pages above maxPixels (or too wide to split into strips) before they are decoded"""
+    pixels = img.width * img.height
+    if not maxPixels or pixels <= maxPixels:
+        return
+
+    if oversize == "refuse":
+        raise ValueError(
+            f"Page is {img.width}x{img.height} ({pixels} pixels), above the limit of {maxPixels}"
+        )
+
+    if maxPixels // img.width < MIN_STRIP_HEIGHT:
+        raise ValueError(
+            f"Page is {img.width}px wide, too wide to split into strips of at least "
+            f"{MIN_STRIP_HEIGHT}px under the limit of {maxPixels} pixels"
+        )
+
+
+async def translatePage(translator, img, maxPixels):
+    """Runs the translator on a page, splitting it into strips when it has too many pixels
+
+    The page should have gone through checkPageSize first
+    """
+    if not maxPixels or img.width * img.height <= maxPixels:
+        return await translator.expandedRun(img)
+
+    # Full width strips so each model pass stays under the limit, text cut by a strip edge may be missed
+    stripHeight = maxPixels // img.width
+    allCached = True
+    for top in range(0, img.height, stripHeight):
+        strip = img.crop((0, top, img.width, min(img.height, top + stripHeight)))
+        r = await translator.expandedRun(strip)
+        img.paste(r["image"], (0, top))
+        allCached = allCached and r["cacheInfo"]["all"]
+        strip.close()
+
+    return {"image": img, "cacheInfo": {"all": allCached}}
+
+
 async def worker(
     queue,
     failedQueue,
@@ -42,7 +114,11 @@ async def worker(
     cachedCounter,
     worker_status,
     imageOptions,
+    memoryOptions,
+    worker_memory,
+    current_items,
 ):
+    """Processes queue items until the sentinel, returns True if it stopped early to be recycled"""
     # print(f"Worker {id} starting")
     worker_status[id] = f"Starting..."
 
@@ -58,35 +134,82 @@ async def worker(
     out_dir.mkdir(parents=True, exist_ok=True)
 
     worker_status[id] = "Loading Module"
-    translator = CookieTranslator(redisCache=redisCache, debug=debug, fontSize=imageOptions["fontSize"])
+    translator = CookieTranslator(
+        redisCache=redisCache,
+        debug=debug,
+        fontSize=imageOptions["fontSize"],
+        backend=createBackend(**imageOptions["backend"]),
+    )
+    encoder = ImageEncoder(**imageOptions["encoder"])
+
+    def onSaved(future, image, key, path_str, name):
+        # runs on the encoder thread once the page is written (or failed to)
+        image.close()
+        current_items.pop(key, None)
+        error = future.exception()
+        if error:
+            worker_status[id] = f"Failed {name}"
+            failedQueue.put({"path": path_str, "name": name, "error": str(error)})
+        with lock:
+            counter.value += 1
+
+    tasksDone = 0
+    # keep the peak from earlier generations of this worker slot
+    memory = dict(worker_memory.get(id, {"peak": 0, "steady": 0, "tasks": 0}))
+    # what the worker uses with its models loaded, before any page
+    memory["baseline"] = currentRss()
+    worker_memory[id] = memory
+
+    maxTasks = memoryOptions["maxTasks"]
+    maxRss = memoryOptions["maxRss"]
+    if maxRss and maxRss <= memory["baseline"]:
+        # it would recycle (and reload every model) after each page
+        tqdm.write(
+            f"Worker {id}: --max-rss {maxRss} MB is at or below the {memory['baseline']:.0f} MB "
+            "used with the models loaded, ignoring it"
+        )
+        maxRss = None
 
     while True:
         item = queue.get()
         # handle sentinel for clean shutdown
         if item is None:
+            worker_status[id] = "Saving remaining images"
+            # wait for pending encodes so they finish before the process exits
+            encoder.shutdown(wait=True)
             worker_status[id] = "Finished"
             queue.task_done()
-            break
+            return False
 
         path_str = item.get("path")
         name = item.get("name")
+        # tracked until the page is written, so the supervisor can fail it if this worker dies
+        key = (id, tasksDone)
+        current_items[key] = item
 
         worker_status[id] = f"Processing {name}"
 
         try:
             # print(f"Worker {id} processing {name}")
             # open the image inside the worker process (images are not reliably picklable)
-            img = Image.open(path_str)
+            with Image.open(path_str) as img:
+                # Image.open only reads the header, check the size before decoding the page
+                checkPageSize(img, memoryOptions["maxPixels"], memoryOptions["oversize"])
+                img.load()
 
             # translated = await translator.run(img)
-            r = await translator.expandedRun(img)
+            r = await translatePage(translator, img, memoryOptions["maxPixels"])
             translated = r["image"]
             if r["cacheInfo"]["all"]:
                 cachedCounter.value += 1
 
-            save_name = f"{Path(name).stem}.webp"
+            save_name = f"{Path(name).stem}{encoder.extension}"
             savePath = out_dir / save_name
-            translated.save(savePath, "webp")
+            # encoding happens on the encoder's threads while the next page is processed,
+            # the image is closed once it is written
+            encoder.save(translated, savePath).add_done_callback(
+                partial(onSaved, image=translated, key=key, path_str=path_str, name=name)
+            )
 
             # print(f"Saved {savePath}")
             worker_status[id] = f"Completed {name}"
@@ -94,31 +217,58 @@ async def worker(
             # print(f"Error processing {name}:", e)
             worker_status[id] = f"Failed {name}"
             failedQueue.put({"path": path_str, "name": name, "error": str(e)})
+            current_items.pop(key, None)
+            with lock:
+                counter.value += 1
 
         finally:
+            img = r = translated = None
             queue.task_done()
-            with lock:
-                counter.value += 1
+
+        tasksDone += 1
+        gc.collect()
+        rss = currentRss()
+        memory["peak"] = max(memory["peak"], peakRss())
+        memory["steady"] = rss
+        memory["tasks"] += 1
+        worker_memory[id] = memory
+
+        if (maxTasks and tasksDone >= maxTasks) or (maxRss and rss > maxRss):
+            worker_status[id] = f"Recycling after {tasksDone} tasks ({rss:.0f} MB)"
+            encoder.shutdown(wait=True)
+            return True
 
 
 def startWorker(*args):
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
-        loop.run_until_complete(worker(*args))
+        recycle = loop.run_until_complete(worker(*args))
     finally:
         loop.close()
 
+    if recycle:
+        sys.exit(RECYCLE_EXIT_CODE)
+
 
-def progress_monitor(counter, total_items, lock, worker_status):
-    """Monitor progress in main process with worker status"""
-    main_bar, status_bars = createStatusBar(total_items, processes)
+def progress_monitor(counter, total_items, lock, worker_status, stop_event=None):
+    """Monitor progress in main process with worker status
+
+    In watch mode total_items is a shared Value that grows as files are found,
+    and the monitor keeps running until stop_event is set
+    """
+    growing = not isinstance(total_items, int)
+    main_bar, status_bars = createStatusBar(
+        total_items.value if growing else total_items, processes
+    )
 
     try:
         while True:
             with lock:
                 current = counter.value
+                total = total_items.value if growing else total_items
 
+            main_bar.total = total
             main_bar.n = current
             main_bar.refresh()
 
@@ -130,7 +280,7 @@ def progress_monitor(counter, total_items, lock, worker_status):
 
                 status_bars[i].refresh()
 
-            if current >= total_items:
+            if current >= total and (stop_event is None or stop_event.is_set()):
                 break
 
             time.sleep(0.1)
@@ -140,9 +290,176 @@ def progress_monitor(counter, total_items, lock, worker_status):
             bar.close()
 
 
-def runBulk(target, outPath, debug, cache_type, redis_url, processes, fontSize):
+def startWorkers(
+    processes,
+    queue,
+    failedQueue,
+    debug,
+    outPath,
+    cache_type,
+    redis_url,
+    counter,
+    lock,
+    cachedCounter,
+    worker_status,
+    imageOptions,
+    memoryOptions,
+    worker_memory,
+    current_items,
+    ignoreStopSignals=False,
+):
+    """Starts the worker processes, each one loads its own models
 
-    imageOptions = {"fontSize": fontSize}
+    Returns the processes and a function that starts a replacement for a worker slot
+    """
+
+    def spawn(i):
+        # with ignoreStopSignals the worker ignores Ctrl+C and SIGTERM so it can drain the queue
+        # after the main loop stops
+        if ignoreStopSignals:
+            defaultHandlers = ignoreSignals(STOP_SIGNALS)
+        try:
+            p = Process(
+                target=startWorker,
+                args=(
+                    queue,
+                    failedQueue,
+                    i,
+                    debug,
+                    outPath,
+                    cache_type,
+                    redis_url,
+                    counter,
+                    lock,
+                    cachedCounter,
+                    worker_status,
+                    imageOptions,
+                    memoryOptions,
+                    worker_memory,
+                    current_items,
+                ),
+            )
+            p.start()
+        finally:
+            if ignoreStopSignals:
+                restoreSignals(defaultHandlers)
+        return p
+
+    return [spawn(i) for i in range(processes)], spawn
+
+
+def superviseWorkers(
+    runningProcesses, spawn, failedQueue, counter, lock, current_items, recycles
+):
+    """Replaces workers that were recycled or died, returns True once no worker is left running"""
+    finished = True
+    for i, p in enumerate(runningProcesses):
+        if p is None:
+            continue
+        if p.is_alive():
+            finished = False
+            continue
+
+        p.join()
+        if p.exitcode == 0:
+            continue
+
+        if p.exitcode == RECYCLE_EXIT_CODE:
+            recycles[i] += 1
+        else:
+            # most likely the OOM killer, fail the page it was on and the ones still waiting
+            # to be encoded, then carry on
+            lost = [key for key in current_items.keys() if key[0] == i]
+            if not lost:
+                # died without a page (e.g. while loading models), restarting won't help
+                print(f"Worker {i} exited with code {p.exitcode}")
+                runningProcesses[i] = None
+                continue
+
+            for key in lost:
+                item = current_items.pop(key)
+                failedQueue.put(
+                    {
+                        "path": item.get("path"),
+                        "name": item.get("name"),
+                        "error": f"Worker exited with code {p.exitcode}",
+                    }
+                )
+                with lock:
+                    counter.value += 1
+
+        runningProcesses[i] = spawn(i)
+        finished = False
+
+    return finished
+
+
+def hasLiveWorkers(runningProcesses):
+    return any(p is not None for p in runningProcesses)
+
+
+def failQueuedItems(queue, failedQueue, counter, lock, error):
+    """Moves pages nobody is going to process from the queue to the failed queue, returns how many"""
+    count = 0
+    while True:
+        try:
+            item = queue.get(timeout=0.5)
+        except Empty:
+            return count
+
+        queue.task_done()
+        # leftover sentinels from workers that died
+        if item is None:
+            continue
+
+        failedQueue.put({"path": item.get("path"), "name": item.get("name"), "error": error})
+        with lock:
+            counter.value += 1
+        count += 1
+
+
+def printMemorySummary(worker_memory, recycles):
+    print("Worker memory (peak / steady-state / with models loaded):")
+    for i in sorted(recycles):
+        memory = worker_memory.get(i)
+        if not memory:
+            continue
+        print(
+            f"  Worker {i}: {memory['peak']:.0f} MB / {memory['steady']:.0f} MB / {memory['baseline']:.0f} MB, "
+            f"{memory['tasks']} tasks, recycled {recycles[i]} times"
+        )
+
+
+FAILED_TASKS_PATH = Path("./failed_tasks.json")
+
+
+def collectFailedTasks(failedQueue, failed_tasks):
+    """Moves new failures from the queue into failed_tasks and rewrites ./failed_tasks.json if there were any"""
+    new = False
+    while not failedQueue.empty():
+        failed_tasks.append(failedQueue.get())
+        failedQueue.task_done()
+        new = True
+
+    if new:
+        with open(FAILED_TASKS_PATH, "w") as f:
+            json.dump(failed_tasks, f, indent=2)
+
+
+def saveFailedTasks(failedQueue, failed_tasks=None):
+    """Drains the failed queue into ./failed_tasks.json"""
+    failed_tasks = [] if failed_tasks is None else failed_tasks
+    collectFailedTasks(failedQueue, failed_tasks)
+
+    if failed_tasks:
+        print(f"Saved {len(failed_tasks)} failed tasks to {FAILED_TASKS_PATH}")
+    else:
+        print("No failed tasks")
+
+
+def runBulk(
+    target, outPath, debug, cache_type, redis_url, processes, imageOptions, memoryOptions
+):
 
     files = [f for f in listdir(target) if f != ".DS_Store"]
 
@@ -168,6 +485,9 @@ def runBulk(target, outPath, debug, cache_type, redis_url, processes, fontSize):
 
     with Manager() as manager:
         worker_status = manager.dict()
+        worker_memory = manager.dict()
+        current_items = manager.dict()
+        recycles = {i: 0 for i in range(processes)}
 
         # Start progress monitor in separate thread
         monitor_thread = threading.Thread(
@@ -176,56 +496,328 @@ def runBulk(target, outPath, debug, cache_type, redis_url, processes, fontSize):
         monitor_thread.daemon = True
         monitor_thread.start()
 
-        runningProcesses = []
-        for i in range(processes):
-            p = Process(
-                target=startWorker,
-                args=(
-                    queue,
+        runningProcesses, spawn = startWorkers(
+            processes,
+            queue,
+            failedQueue,
+            debug,
+            outPath,
+            cache_type,
+            redis_url,
+            counter,
+            lock,
+            cachedCounter,
+            worker_status,
+            imageOptions,
+            memoryOptions,
+            worker_memory,
+            current_items,
+        )
+
+        # Wait for the workers to process everything and exit on their sentinel,
+        # replacing the ones that get recycled on the way
+        while not superviseWorkers(
+            runningProcesses,
+            spawn,
+            failedQueue,
+            counter,
+            lock,
+            current_items,
+            recycles,
+        ):
+            time.sleep(0.5)
+
+        # every worker exited, anything still queued was never processed
+        lost = failQueuedItems(queue, failedQueue, counter, lock, "No workers left")
+        if lost:
+            print(f"No workers left, {lost} pages were not processed")
+            printMemorySummary(worker_memory, recycles)
+            saveFailedTasks(failedQueue)
+            sys.exit(1)
+
+        print("All tasks completed")
+
+        print(f"{cachedCounter.value}/{total_items} Items fully cached")
+
+        printMemorySummary(worker_memory, recycles)
+
+        # Save failed tasks to a JSON file
+        saveFailedTasks(failedQueue)
+
+
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def ignoreSignals(signals):
+    """Ignores the signals (inherited by processes started meanwhile), returns the old handlers"""
+    return {sig: signal.signal(sig, signal.SIG_IGN) for sig in signals}
+
+
+def restoreSignals(handlers):
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def stopWatch(signum, frame):
+    # Handled like Ctrl+C by the watch loop
+    raise KeyboardInterrupt
+
+
+def alreadyTranslated(entry, out_dir, extension):
+    """Checks if an output newer than the input already exists, so restarts don't redo work"""
+    out_file = out_dir / f"{Path(entry.name).stem}{extension}"
+    try:
+        return out_file.stat().st_mtime_ns >= entry.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def runWatch(
+    target,
+    outPath,
+    debug,
+    cache_type,
+    redis_url,
+    processes,
+    imageOptions,
+    memoryOptions,
+    interval,
+):
+    """Keeps the workers (and their models) loaded and queues new files as they show up in target.
+
+    A file is only queued once its size and mtime stay the same between two scans, so
+    half-copied pages aren't picked up. Each (name, mtime, size) is queued at most once;
+    a file that is rewritten gets queued again.
+    """
+
+    out_dir = Path(outPath)
+    extension = ImageEncoder.FORMATS[imageOptions["encoder"]["format"]][1]
+
+    queue = JoinableQueue()
+    failedQueue = JoinableQueue()
+
+    counter = Value("i", 0)
+    queuedCounter = Value("i", 0)
+    cachedCounter = Value("i", 0)
+    lock = Lock()
+
+    seen = {}  # name -> signature that was queued (or skipped)
+    pending = {}  # name -> signature from the last scan, waiting to settle
+    failed_tasks = []  # written to failed_tasks.json as they come in, not just at exit
+
+    # The manager process ignores Ctrl+C and SIGTERM so the workers can still report after the watch loop stops
+    defaultHandlers = ignoreSignals(STOP_SIGNALS)
+    manager = Manager()
+    restoreSignals(defaultHandlers)
+
+    with manager:
+        worker_status = manager.dict()
+        worker_memory = manager.dict()
+        current_items = manager.dict()
+        recycles = {i: 0 for i in range(processes)}
+
+        stop_event = threading.Event()
+        monitor_thread = threading.Thread(
+            target=progress_monitor,
+            args=(counter, queuedCounter, lock, worker_status, stop_event),
+        )
+        monitor_thread.daemon = True
+        monitor_thread.start()
+
+        runningProcesses, spawn = startWorkers(
+            processes,
+            queue,
+            failedQueue,
+            debug,
+            outPath,
+            cache_type,
+            redis_url,
+            counter,
+            lock,
+            cachedCounter,
+            worker_status,
+            imageOptions,
+            memoryOptions,
+            worker_memory,
+            current_items,
+            ignoreStopSignals=True,
+        )
+
+        # SIGTERM (systemctl/docker stop) stops the watch the same way Ctrl+C does
+        defaultSigterm = signal.signal(signal.SIGTERM, stopWatch)
+
+        try:
+            while True:
+                superviseWorkers(
+                    runningProcesses,
+                    spawn,
                     failedQueue,
-                    i,
-                    debug,
-                    outPath,
-                    cache_type,
-                    redis_url,
                     counter,
                     lock,
-                    cachedCounter,
-                    worker_status,
-                    imageOptions,
-                ),
-            )
-            p.start()
-            runningProcesses.append(p)
+                    current_items,
+                    recycles,
+                )
 
-            # Wait for all tasks to be processed
-        queue.join()
+                collectFailedTasks(failedQueue, failed_tasks)
 
-        # Workers should exit after receiving sentinel; join them
-        for p in runningProcesses:
-            p.join()
+                if not hasLiveWorkers(runningProcesses):
+                    print("No workers left, stopping watch")
+                    break
 
-            print("All tasks completed")
+                names = set()
+                with scandir(target) as entries:
+                    for entry in entries:
+                        if entry.name == ".DS_Store" or not entry.is_file():
+                            continue
 
-        print(f"{cachedCounter.value}/{total_items} Items fully cached")
+                        names.add(entry.name)
 
-        # Save failed tasks to a JSON file
-        failed_tasks = []
-        while not failedQueue.empty():
-            failed_tasks.append(failedQueue.get())
-            failedQueue.task_done()
-
-        if failed_tasks:
-            failed_path = Path("./failed_tasks.json")
-            with open(failed_path, "w") as f:
-                json.dump(failed_tasks, f, indent=2)
-            print(f"Saved {len(failed_tasks)} failed tasks to {failed_path}")
-        else:
-            print("No failed tasks")
+                        stat = entry.stat()
+                        signature = (stat.st_mtime_ns, stat.st_size)
+
+                        if seen.get(entry.name) == signature:
+                            continue
+
+                        if pending.get(entry.name) != signature:
+                            # first time seeing this version, wait one scan for it to settle
+                            pending[entry.name] = signature
+                            continue
+
+                        del pending[entry.name]
+                        seen[entry.name] = signature
+
+                        if alreadyTranslated(entry, out_dir, extension):
+                            continue
+
+                        with lock:
+                            queuedCounter.value += 1
+                        queue.put({"path": entry.path, "name": entry.name})
+
+                # forget files that were deleted so these don't grow forever
+                for known in (seen, pending):
+                    for name in known.keys() - names:
+                        del known[name]
+
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("Stopping watch, finishing queued files...")
+        finally:
+            # a second SIGTERM while draining stops right away
+            signal.signal(signal.SIGTERM, defaultSigterm)
+
+        for _ in range(processes):
+            queue.put(None)
+
+        while not superviseWorkers(
+            runningProcesses,
+            spawn,
+            failedQueue,
+            counter,
+            lock,
+            current_items,
+            recycles,
+        ):
+            time.sleep(0.5)
+
+        lost = failQueuedItems(queue, failedQueue, counter, lock, "No workers left")
+
+        stop_event.set()
+        monitor_thread.join(timeout=1)
+
+        if lost:
+            print(f"No workers left, {lost} pages were not processed")
+
+        print(f"{cachedCounter.value}/{queuedCounter.value} Items fully cached")
+
+        printMemorySummary(worker_memory, recycles)
+
+        saveFailedTasks(failedQueue, failed_tasks)
+
+        if lost or not hasLiveWorkers(runningProcesses):
+            sys.exit(1)
+
+
+SNAPSHOT_COMMANDS = ("export-cache", "import-cache")
+
+
+def runSnapshotCommand(argv):
+    """Handles the export-cache and import-cache subcommands"""
+    parser = argparse.ArgumentParser(
+        prog="Cookie Translator",
+        description="Export or import the redis cache as a compressed snapshot",
+        epilog="2025 EpicOreo",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    exportParser = subparsers.add_parser(
+        "export-cache", help="Write the cache to a snapshot file"
+    )
+    exportParser.add_argument(
+        "-o", "--output", type=str, required=True, help="Path of the snapshot, e.g. cache.jsonl.gz"
+    )
+
+    importParser = subparsers.add_parser(
+        "import-cache", help="Load a snapshot file into the cache"
+    )
+    importParser.add_argument(
+        "-i", "--input", type=str, required=True, help="Path of the snapshot to load"
+    )
+    importParser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace keys that already exist instead of keeping them",
+    )
+
+    for sub in (exportParser, importParser):
+        sub.add_argument(
+            "-r", "--redis-url", type=str, required=True, help="Redis server URL"
+        )
+        sub.add_argument(
+            "-s",
+            "--sections",
+            nargs="+",
+            choices=SECTIONS,
+            default=list(SECTIONS),
+            help="Cache sections to include (default: all)",
+        )
+        sub.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of keys per pipelined redis round trip (default: 500)",
+        )
+
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        parser.error("The batch size must be at least 1")
+
+    redisCache = redis.Redis(args.redis_url, decode_responses=True)
+
+    if args.command == "export-cache":
+        counts = exportCache(redisCache, args.output, args.sections, args.batch_size)
+        print(f"Exported {sum(counts.values())} keys to {args.output}")
+    else:
+        if not Path(args.input).is_file():
+            parser.error("The input path must be a valid file")
+        try:
+            counts = importCache(
+                redisCache, args.input, args.sections, args.batch_size, args.overwrite
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Imported {sum(counts.values())} keys from {args.input}")
+
+    for section, count in counts.items():
+        print(f"  {section}: {count}")
 
 
 if __name__ == "__main__":
 
+    if len(sys.argv) > 1 and sys.argv[1] in SNAPSHOT_COMMANDS:
+        runSnapshotCommand(sys.argv[1:])
+        sys.exit()
+
     parser = argparse.ArgumentParser(
         prog="Cookie Translator",
         description="Translate manga images using OCR and Google Translate",
@@ -263,6 +855,18 @@ if __name__ == "__main__":
     parser.add_argument(
         "-b", "--bulk", action="store_true", help="Enable bulk processing mode"
     )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Keep running in bulk mode and translate new files as they are added to the input folder",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between scans of the input folder in watch mode (default: 2)",
+    )
     parser.add_argument(
         "--processes",
         type=int,
@@ -270,6 +874,29 @@ if __name__ == "__main__":
         help="Number of parallel processes for bulk mode (default: 4)",
     )
 
+    parser.add_argument(
+        "--max-tasks-per-worker",
+        type=int,
+        help="Restart a bulk worker after this many pages to give its memory back",
+    )
+    parser.add_argument(
+        "--max-rss",
+        type=int,
+        help="Restart a bulk worker once it uses more than this many MB after a page, must be above what a worker uses with its models loaded",
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        help="Pages with more pixels than this are refused or split, see --oversize",
+    )
+    parser.add_argument(
+        "--oversize",
+        type=str,
+        choices=["refuse", "tile"],
+        default="refuse",
+        help="What to do with pages above --max-pixels, tile translates them in horizontal strips (default: refuse)",
+    )
+
     parser.add_argument(
         "--font-size",
         type=int,
@@ -277,6 +904,10 @@ if __name__ == "__main__":
         help="Font size for pasted text (default: 25)",
     )
 
+    addBackendArguments(parser)
+
+    addEncoderArguments(parser)
+
     args = parser.parse_args()
 
     target = args.input
@@ -284,11 +915,34 @@ if __name__ == "__main__":
     debug = args.debug
     cache_type = args.cache_type
     redis_url = args.redis_url
-    bulk = args.bulk
+    bulk = args.bulk or args.watch
+    watch = args.watch
+    watchInterval = args.watch_interval
     processes = args.processes
 
     fontSize = args.font_size
 
+    encoderOptions = encoderOptionsFromArgs(parser, args)
+
+    for option in ("max_tasks_per_worker", "max_rss", "max_pixels"):
+        if getattr(args, option) is not None and getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+
+    memoryOptions = {
+        "maxTasks": args.max_tasks_per_worker,
+        "maxRss": args.max_rss,
+        "maxPixels": args.max_pixels,
+        "oversize": args.oversize,
+    }
+
+    backendOptions = backendOptionsFromArgs(parser, args)
+
+    imageOptions = {
+        "fontSize": fontSize,
+        "backend": backendOptions,
+        "encoder": encoderOptions,
+    }
+
     if cache_type == "redis" and not redis_url:
         parser.error(
             "The --redis-url argument is required when --cache-type is 'redis'"
@@ -318,9 +972,17 @@ if __name__ == "__main__":
       if processes < 1 or processes > cpu_cores:
         parser.error(f"The number of processes must be between 1 and {cpu_cores}")
 
-      print(f"Running in bulk mode with {processes} processes")
+      if watch:
+        if watchInterval <= 0:
+          parser.error("The watch interval must be greater than 0")
+
+        print(f"Watching {input_path} with {processes} processes, press Ctrl+C to stop")
+
+        runWatch(input_path, outPath, debug, cache_type, redis_url, processes, imageOptions, memoryOptions, watchInterval)
+      else:
+        print(f"Running in bulk mode with {processes} processes")
 
-      runBulk(input_path, outPath, debug, cache_type, redis_url, processes, fontSize)
+        runBulk(input_path, outPath, debug, cache_type, redis_url, processes, imageOptions, memoryOptions)
     else:
 
       # check that input is a file
@@ -339,7 +1001,8 @@ if __name__ == "__main__":
               else None
           ),
           debug=debug,
-          fontSize = fontSize
+          fontSize = fontSize,
+          backend=createBackend(**backendOptions),
       )
 
       print(f"Translating {input_path}...")
@@ -3,13 +3,171 @@ from io import BytesIO
 from quart import Quart, request, jsonify
 import requests, base64
 from translator import CookieTranslator
+from encoder import ImageEncoder, SizeBudgetExceeded, addEncoderArguments, encoderOptionsFromArgs
+from backends import addBackendArguments, backendOptionsFromArgs, createBackend
 from PIL import Image
 import hashlib
+import argparse
+import asyncio
+import threading
 from os import path
+import json
+from collections import deque
+from collections.abc import Awaitable, Callable
 
 app = Quart(__name__)
 BASE_URL = 'http://127.0.0.1:5000'
 
+
+class QueueFull(Exception):
+  pass
+
+
+class PipelineThread():
+  """Runs the translation pipeline on its own thread and event loop.
+  
+  OCR, painting and drawing are blocking, so running them here keeps the server's loop free to
+  accept requests, notice disconnects and answer /api/stats. The Scheduler only gives it one job
+  at a time since the models aren't thread-safe.
+  """
+  
+  def __init__(self):
+    self.loop = asyncio.new_event_loop()
+    self.__thread = threading.Thread(target=self.loop.run_forever, name="pipeline", daemon=True)
+    self.__thread.start()
+  
+  async def run(self, coro):
+    # Cancelling this also cancels the coroutine on the pipeline loop (at its next await)
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+
+class Scheduler():
+  """Runs translate jobs a few at a time, always starting interactive jobs before prefetch ones.
+  
+  Each priority has its own bounded queue. Requests with the same key share one job, and a queued
+  prefetch job is promoted when an interactive request for it comes in. A job whose requests all go
+  away (the clients disconnected) is dropped from the queue or cancelled if it already started.
+  """
+  
+  PRIORITIES = ("interactive", "prefetch")
+  
+  def __init__(self, concurrency=1, maxQueued=None):
+    self.concurrency = concurrency
+    self.maxQueued = {"interactive": 32, "prefetch": 128, **(maxQueued or {})}
+    
+    self.__queues = {priority: deque() for priority in self.PRIORITIES}
+    self.__running: set[asyncio.Task] = set()
+    self.__jobs: dict[str, dict] = {}  # key -> queued or running entry
+    self.__stats = {
+      priority: {"completed": 0, "cancelled": 0, "rejected": 0, "failed": 0, "shared": 0, "promoted": 0}
+      for priority in self.PRIORITIES
+    }
+  
+  def stats(self) -> dict:
+    return {
+      "running": len(self.__running),
+      "concurrency": self.concurrency,
+      "queues": {
+        priority: {
+          "queued": len(self.__queues[priority]),
+          "maxQueued": self.maxQueued[priority],
+          **self.__stats[priority],
+        }
+        for priority in self.PRIORITIES
+      },
+    }
+  
+  def __pump(self):
+    # Start queued jobs while there are free slots, highest priority first
+    while len(self.__running) < self.concurrency:
+      entry = next((self.__queues[p].popleft() for p in self.PRIORITIES if self.__queues[p]), None)
+      if entry is None:
+        return
+      
+      task = asyncio.create_task(entry["job"]())
+      entry["task"] = task
+      self.__running.add(task)
+      task.add_done_callback(lambda t, entry=entry: self.__finished(t, entry))
+  
+  def __finished(self, task: asyncio.Task, entry: dict):
+    self.__running.discard(task)
+    if self.__jobs.get(entry["key"]) is entry:
+      del self.__jobs[entry["key"]]
+    
+    priority = entry["priority"]
+    future = entry["future"]
+    if task.cancelled():
+      self.__stats[priority]["cancelled"] += 1
+      future.cancel()
+    elif task.exception() is not None:
+      self.__stats[priority]["failed"] += 1
+      future.set_exception(task.exception())
+      if entry["waiters"] == 0:
+        # nobody is left to read it, mark it retrieved
+        future.exception()
+    else:
+      self.__stats[priority]["completed"] += 1
+      future.set_result(task.result())
+    
+    self.__pump()
+  
+  def __join(self, entry: dict, priority: str):
+    """Adds a request to an existing job, moving it up a queue if the request is more urgent"""
+    self.__stats[priority]["shared"] += 1
+    current = entry["priority"]
+    if "task" in entry or self.PRIORITIES.index(priority) >= self.PRIORITIES.index(current):
+      return
+    
+    self.__queues[current].remove(entry)
+    self.__queues[priority].append(entry)
+    entry["priority"] = priority
+    self.__stats[priority]["promoted"] += 1
+  
+  async def run(self, priority: str, job: Callable[[], Awaitable], key: str | None = None):
+    if priority not in self.PRIORITIES:
+      raise ValueError(f"Unknown priority {priority}")
+    
+    entry = self.__jobs.get(key) if key is not None else None
+    if entry is not None:
+      self.__join(entry, priority)
+    else:
+      queue = self.__queues[priority]
+      if len(queue) >= self.maxQueued[priority]:
+        self.__stats[priority]["rejected"] += 1
+        raise QueueFull(priority)
+      
+      entry = {
+        "key": key,
+        "priority": priority,
+        "job": job,
+        "future": asyncio.get_running_loop().create_future(),
+        "waiters": 0,
+      }
+      queue.append(entry)
+      if key is not None:
+        self.__jobs[key] = entry
+      self.__pump()
+    
+    entry["waiters"] += 1
+    try:
+      # shield so one request going away doesn't cancel a job others are waiting on
+      return await asyncio.shield(entry["future"])
+    except asyncio.CancelledError:
+      entry["waiters"] -= 1
+      if entry["waiters"] == 0 and not entry["future"].done():
+        # The last request for it was cancelled (client went away), don't spend time on it.
+        # Forget the key right away so a new request starts a fresh job instead of joining this one
+        if self.__jobs.get(key) is entry:
+          del self.__jobs[key]
+        if "task" in entry:
+          entry["task"].cancel()
+        else:
+          self.__queues[entry["priority"]].remove(entry)
+          self.__stats[entry["priority"]]["cancelled"] += 1
+          entry["future"].cancel()
+      raise
+
+
 @app.route("/")
 def hello_world():
     return "<p>Hello, World!</p>"
@@ -17,41 +175,83 @@ def hello_world():
 
 @app.route("/api/translate", methods=["GET"])
 async def translate():
-  global cookieTranslate
+  global cookieTranslate, imageEncoder, scheduler, pipeline
   url = request.args.get('url')
+  # "image" returns a translated image, "overlay" only the boxes and text so the client draws them
+  mode = request.args.get('mode', 'image')
+  # "interactive" for the page being looked at, "prefetch" for pages the reader might open next
+  priority = request.args.get('priority', 'interactive')
   print(f"Starting web translate of {url}")
   
   if not url:
     return jsonify({"error": "no url"})
+  if mode not in ("image", "overlay"):
+    return jsonify({"error": "unknown mode"})
+  if priority not in Scheduler.PRIORITIES:
+    return jsonify({"error": "unknown priority"})
   url_hash = hashlib.sha256(url.encode()).hexdigest()
-  savePath = f"./static/translated/{url_hash}.webp"
+  
+  if mode == "overlay":
+    savePath = f"./static/translated/{url_hash}.json"
+  else:
+    savePath = f"./static/translated/{url_hash}{imageEncoder.extension}"
   
   
   if path.exists(savePath):
     print("Using existing")
+    if mode == "overlay":
+      with open(savePath) as f:
+        return jsonify(json.load(f))
     data = {'url': BASE_URL+(savePath[1:])}
     return jsonify(data)
   
   
-  if url.startswith("data:image"):
-    base64_string = url.split(',')[1]
-    img_data = base64.b64decode(base64_string)
-  else:
-    img_data = requests.get(url).content
+  async def translatePage():
+    # Runs on the pipeline thread, blocking here doesn't hold up the server
+    if url.startswith("data:image"):
+      base64_string = url.split(',')[1]
+      img_data = base64.b64decode(base64_string)
+    else:
+      img_data = requests.get(url).content
 
-  byte_stream = BytesIO(img_data)
-  image = Image.open(byte_stream)
-  
+    byte_stream = BytesIO(img_data)
+    image = Image.open(byte_stream)
+    
+
+    if mode == "overlay":
+      data = {
+        "width": image.width,
+        "height": image.height,
+        "boxes": await cookieTranslate.overlay(image),
+      }
+      with open(savePath, "w") as f:
+        json.dump(data, f)
+      return data
+    
+    translated = await cookieTranslate.run(image)
+    
+    # encode on the encoder's threads so the next page can start meanwhile
+    try:
+      await asyncio.wrap_future(imageEncoder.save(translated, savePath))
+    except SizeBudgetExceeded as e:
+      # the image is still saved, serve it and log the overrun
+      print(e)
 
+    return {'url': BASE_URL+savePath[1:]}
   
-  translated = await cookieTranslate.run(image)
+  try:
+    # keyed by the output path so repeated requests for a page share one job
+    data = await scheduler.run(priority, lambda: pipeline.run(translatePage()), key=savePath)
+  except QueueFull:
+    return jsonify({"error": f"{priority} queue is full"})
   
-  translated.save(savePath, "webp")
-
-  data = {'url': BASE_URL+savePath[1:]}
   return jsonify(data)
 
 
+@app.route("/api/stats", methods=["GET"])
+async def stats():
+  return jsonify(scheduler.stats())
+
 
 @app.after_request
 async def after_request(response):
@@ -72,7 +272,22 @@ async def after_request(response):
 
 if __name__ == "__main__":  
   
-  cookieTranslate = CookieTranslator()
+  parser = argparse.ArgumentParser(
+    prog="Cookie Translator Server",
+    description="Serves the translate api used by the browser script",
+  )
+  addBackendArguments(parser)
+  addEncoderArguments(parser)
+  args = parser.parse_args()
+  
+  encoderOptions = encoderOptionsFromArgs(parser, args)
+  
+  backendOptions = backendOptionsFromArgs(parser, args)
+  
+  cookieTranslate = CookieTranslator(backend=createBackend(**backendOptions))
+  imageEncoder = ImageEncoder(**encoderOptions)
+  scheduler = Scheduler()
+  pipeline = PipelineThread()
 
   
   app.run(port=5000)
\ No newline at end of file
@@ -0,0 +1,102 @@
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import gzip
+import json
+import redis
+
+# Cache sections written by CookieTranslator
+SECTIONS = ("boxes", "readText", "translate")
+
+SNAPSHOT_FORMAT = "cookie-translate-cache"
+SNAPSHOT_VERSION = 1
+
+
+def _batches(items: Iterable, size: int):
+  batch = []
+  for item in items:
+    batch.append(item)
+    if len(batch) >= size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+
+def exportCache(redisCache: redis.Redis, outPath, sections=SECTIONS, batchSize=500) -> dict:
+  """Writes the cache sections to a gzipped JSON lines snapshot, returns how many keys per section were written
+
+  The first line is a header with the format version, every other line is {"k": key, "v": value}
+  """
+  counts = {section: 0 for section in sections}
+
+  with gzip.open(outPath, "wt", encoding="utf-8") as f:
+    header = {
+      "format": SNAPSHOT_FORMAT,
+      "version": SNAPSHOT_VERSION,
+      "sections": list(sections),
+      "created": datetime.now(timezone.utc).isoformat(),
+    }
+    f.write(json.dumps(header) + "\n")
+
+    for section in sections:
+      keys = redisCache.scan_iter(match=f"{section}:*", count=batchSize)
+
+      for batch in _batches(keys, batchSize):
+        pipe = redisCache.json().pipeline(transaction=False)
+        for key in batch:
+          pipe.get(key)
+
+        for key, value in zip(batch, pipe.execute()):
+          # key expired between the scan and the read
+          if value is None:
+            continue
+          f.write(json.dumps({"k": key, "v": value}, separators=(",", ":"), ensure_ascii=False) + "\n")
+          counts[section] += 1
+
+  return counts
+
+
+def importCache(redisCache: redis.Redis, inPath, sections=SECTIONS, batchSize=500, overwrite=False) -> dict:
+  """Loads a snapshot into redis with pipelined writes, returns how many keys per section were written
+
+  Existing keys are kept unless overwrite is set
+  """
+  counts = {section: 0 for section in sections}
+
+  with gzip.open(inPath, "rt", encoding="utf-8") as f:
+    try:
+      header = json.loads(f.readline() or "{}")
+    # not gzip (BadGzipFile is an OSError), truncated, or not text/json
+    except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+      raise ValueError(f"{inPath} is not a cache snapshot ({e})") from e
+
+    if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+      raise ValueError(f"{inPath} is not a cache snapshot")
+    if header.get("version") != SNAPSHOT_VERSION:
+      raise ValueError(f"Unsupported snapshot version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+
+    def entries():
+      lineNumber = 1
+      try:
+        for lineNumber, line in enumerate(f, start=2):
+          entry = json.loads(line)
+          section = entry["k"].split(":", 1)[0]
+          if section in counts:
+            yield section, entry
+      except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"{inPath} has a broken entry near line {lineNumber} ({e})") from e
+
+    for batch in _batches(entries(), batchSize):
+      pipe = redisCache.json().pipeline(transaction=False)
+      for _, entry in batch:
+        if overwrite:
+          pipe.set(entry["k"], "$", entry["v"])
+        else:
+          pipe.set(entry["k"], "$", entry["v"], nx=True)
+
+      for (section, _), written in zip(batch, pipe.execute()):
+        # nx sets return None when the key already exists
+        if written:
+          counts[section] += 1
+
+  return counts
@@ -0,0 +1,55 @@
+from fnmatch import fnmatchcase
+
+
+class FakeJsonPipeline():
+  """Queues JSON.GET/JSON.SET calls like a redis pipeline, runs them on execute()"""
+
+  def __init__(self, store):
+    self.store = store
+    self.commands = []
+
+  def get(self, key):
+    self.commands.append(lambda: self.store.get(key))
+
+  def set(self, key, path, value, nx=False):
+    def command():
+      if nx and key in self.store:
+        return None
+      self.store[key] = value
+      return True
+    self.commands.append(command)
+
+  def execute(self):
+    results = [command() for command in self.commands]
+    self.commands = []
+    return results
+
+
+class FakeJson():
+  def __init__(self, store):
+    self.store = store
+
+  def get(self, key):
+    return self.store[key]
+
+  def set(self, key, path, value):
+    self.store[key] = value
+
+  def pipeline(self, transaction=True):
+    return FakeJsonPipeline(self.store)
+
+
+class FakeRedis():
+  """Just enough of redis.Redis (with RedisJSON) for the translator's cache and the snapshots"""
+
+  def __init__(self, store=None):
+    self.store = {} if store is None else store
+
+  def exists(self, key):
+    return key in self.store
+
+  def json(self):
+    return FakeJson(self.store)
+
+  def scan_iter(self, match="*", count=None):
+    return [key for key in list(self.store) if fnmatchcase(key, match)]
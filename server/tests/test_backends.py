@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import pytest
+from backends import LocalBackend, GoogleBackend, createBackend, addBackendArguments, backendOptionsFromArgs
+
+
+class FakeEncoding(dict):
+  def to(self, device):
+    return self
+
+
+class FakeTokenizer():
+  """Stands in for a Hugging Face tokenizer, the "ids" are just the strings"""
+
+  def __call__(self, texts, **kwargs):
+    return FakeEncoding(input_ids=list(texts))
+
+  def batch_decode(self, outputs, skip_special_tokens=False):
+    return list(outputs)
+
+
+class FakeModel():
+  """Stands in for a seq2seq model, records every batch it is asked to generate"""
+
+  name_or_path = "fake-ja-en"
+
+  def __init__(self):
+    self.batches = []
+
+  def eval(self):
+    return self
+
+  def generate(self, input_ids, **kwargs):
+    self.batches.append(list(input_ids))
+    return [f"en({text})" for text in input_ids]
+
+
+def makeBackend(**options):
+  model = FakeModel()
+  return LocalBackend(model=model, tokenizer=FakeTokenizer(), **options), model
+
+
+def test_batches_by_batch_size():
+  backend, model = makeBackend(batchSize=2)
+  backend.translateSync(["a", "bb", "ccc", "dddd", "eeeee"])
+  assert [len(batch) for batch in model.batches] == [2, 2, 1]
+
+
+def test_batches_are_sorted_by_length():
+  backend, model = makeBackend(batchSize=2)
+  backend.translateSync(["cccc", "a", "bbb", "dd"])
+  assert model.batches == [["a", "dd"], ["bbb", "cccc"]]
+
+
+def test_keeps_order():
+  backend, _ = makeBackend(batchSize=2)
+  texts = ["ccc", "a", "bb", "dddd"]
+  assert backend.translateSync(texts) == [f"en({t})" for t in texts]
+
+
+def test_deduplicates():
+  backend, model = makeBackend()
+  result = backend.translateSync(["a", "b", "a", "a"])
+  assert result == ["en(a)", "en(b)", "en(a)", "en(a)"]
+  assert model.batches == [["a", "b"]]
+
+
+def test_empty_strings_skip_the_model():
+  backend, model = makeBackend()
+  assert backend.translateSync(["", "  ", "a"]) == ["", "", "en(a)"]
+  assert model.batches == [["a"]]
+
+  assert backend.translateSync([]) == []
+  assert len(model.batches) == 1
+
+
+def test_cache_hit():
+  backend, model = makeBackend()
+  backend.translateSync(["a", "b"])
+  assert backend.translateSync(["b", "a"]) == ["en(b)", "en(a)"]
+  assert len(model.batches) == 1
+
+
+def test_cache_evicts_least_recently_used():
+  backend, model = makeBackend(maxCacheSize=2)
+  backend.translateSync(["a"])
+  backend.translateSync(["b"])
+  # touch "a" so "b" is the oldest
+  backend.translateSync(["a"])
+  backend.translateSync(["c"])
+  assert len(model.batches) == 3
+
+  backend.translateSync(["a"])
+  assert len(model.batches) == 3
+
+  backend.translateSync(["b"])
+  assert model.batches[-1] == ["b"]
+
+
+def test_translate_bulk_is_async():
+  backend, _ = makeBackend()
+  assert asyncio.run(backend.translateBulk(["a", "b"])) == ["en(a)", "en(b)"]
+
+
+def test_cache_prefix():
+  backend, _ = makeBackend()
+  assert backend.cachePrefix == "local-fake-ja-en-"
+
+  # skip __init__ so googletrans isn't needed
+  assert GoogleBackend.__new__(GoogleBackend).cachePrefix == ""
+
+
+def test_unknown_backend():
+  with pytest.raises(ValueError):
+    createBackend("nope")
+
+
+def test_backend_arguments():
+  parser = argparse.ArgumentParser()
+  addBackendArguments(parser)
+
+  args = parser.parse_args([])
+  assert backendOptionsFromArgs(parser, args) == {"name": "google"}
+
+  args = parser.parse_args(["--backend", "local", "--local-model", "tiny", "--translate-batch-size", "4"])
+  assert backendOptionsFromArgs(parser, args) == {"name": "local", "model": "tiny", "batchSize": 4}
+
+  args = parser.parse_args(["--translate-batch-size", "0"])
+  with pytest.raises(SystemExit):
+    backendOptionsFromArgs(parser, args)
+
+
+def makeTinyModel():
+  """A randomly initialised seq2seq model and a word level tokenizer, built locally with no download"""
+  from tokenizers import Tokenizer, models, pre_tokenizers
+  from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+  words = ["<pad>", "</s>", "<unk>", "<s>", "neko", "inu", "tori", "sakana"]
+  vocab = {word: i for i, word in enumerate(words)}
+  tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+  tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+  tokenizer = PreTrainedTokenizerFast(
+    tokenizer_object=tokenizer,
+    pad_token="<pad>",
+    eos_token="</s>",
+    unk_token="<unk>",
+    bos_token="<s>",
+    model_input_names=["input_ids", "attention_mask"],
+  )
+
+  config = BartConfig(
+    vocab_size=len(words),
+    d_model=16,
+    encoder_layers=1,
+    decoder_layers=1,
+    encoder_attention_heads=2,
+    decoder_attention_heads=2,
+    encoder_ffn_dim=32,
+    decoder_ffn_dim=32,
+    max_position_embeddings=64,
+    pad_token_id=0,
+    eos_token_id=1,
+    bos_token_id=3,
+    decoder_start_token_id=1,
+    forced_bos_token_id=None,
+    forced_eos_token_id=None,
+  )
+  return BartForConditionalGeneration(config), tokenizer
+
+
+def test_tiny_transformers_model():
+  pytest.importorskip("torch")
+  pytest.importorskip("tokenizers")
+  pytest.importorskip("transformers")
+
+  model, tokenizer = makeTinyModel()
+  backend = LocalBackend(model=model, tokenizer=tokenizer, batchSize=2, maxLength=4, numBeams=2)
+
+  texts = ["neko inu", "tori", "", "neko inu", "sakana tori neko"]
+  result = backend.translateSync(texts)
+
+  assert len(result) == len(texts)
+  assert all(isinstance(text, str) for text in result)
+  assert result[2] == ""
+  assert result[0] == result[3]
+  # the second call is answered from the cache
+  assert backend.translateSync(["tori", "neko inu"]) == [result[1], result[0]]
@@ -0,0 +1,84 @@
+import os
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image
+from encoder import ImageEncoder, SizeBudgetExceeded
+
+
+def noise(size=(128, 128), mode="RGB"):
+  # random pixels don't compress, so a tiny budget can never be met
+  return Image.frombytes(mode, size, os.urandom(size[0] * size[1] * len(mode)))
+
+
+def recordAttempts(monkeypatch, encoder):
+  """Records the (quality, compressLevel) of every encode attempt"""
+  attempts = []
+  original = encoder._ImageEncoder__encodeOnce
+
+  def encodeOnce(image, quality, compressLevel):
+    attempts.append((quality, compressLevel))
+    return original(image, quality, compressLevel)
+
+  monkeypatch.setattr(encoder, "_ImageEncoder__encodeOnce", encodeOnce)
+  return attempts
+
+
+def test_no_budget_encodes_once(monkeypatch):
+  encoder = ImageEncoder(format="webp", quality=80)
+  attempts = recordAttempts(monkeypatch, encoder)
+
+  data = encoder.encode(noise())
+
+  assert data[8:12] == b"WEBP"
+  assert attempts == [(80, 6)]
+  encoder.shutdown()
+
+
+def test_tiny_budget_steps_quality_down(monkeypatch):
+  encoder = ImageEncoder(format="jpeg", quality=80, maxBytes=100)
+  attempts = recordAttempts(monkeypatch, encoder)
+
+  encoder.encode(noise())
+
+  assert [quality for quality, _ in attempts] == [80, 70, 60, 50, 40, 30]
+  encoder.shutdown()
+
+
+def test_png_budget_retries_at_max_compression(monkeypatch):
+  encoder = ImageEncoder(format="png", compressLevel=1, maxBytes=100)
+  attempts = recordAttempts(monkeypatch, encoder)
+
+  encoder.encode(noise())
+
+  assert [level for _, level in attempts] == [1, 9]
+  encoder.shutdown()
+
+
+def test_save_raises_when_over_budget(tmp_path):
+  encoder = ImageEncoder(format="webp", maxBytes=100)
+  savePath = tmp_path / "page.webp"
+
+  with pytest.raises(SizeBudgetExceeded) as error:
+    encoder.save(noise(), savePath).result()
+
+  # the smallest attempt is still written
+  assert savePath.stat().st_size == error.value.size
+  assert error.value.size > error.value.maxBytes == 100
+  encoder.shutdown()
+
+
+def test_save_under_budget(tmp_path):
+  encoder = ImageEncoder(format="jpeg", maxBytes=10_000_000)
+  savePath = tmp_path / "page.jpg"
+
+  # jpeg can't store alpha, the encoder converts it
+  assert encoder.save(noise(mode="RGBA"), savePath).result() == savePath
+  assert Image.open(savePath).format == "JPEG"
+  encoder.shutdown()
+
+
+def test_unknown_format():
+  with pytest.raises(ValueError):
+    ImageEncoder(format="gif")
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+
+# server.py pulls in quart and the whole translator at import time
+pytest.importorskip("quart")
+pytest.importorskip("manga_ocr")
+pytest.importorskip("easyocr")
+
+from server import Scheduler, PipelineThread, QueueFull
+
+
+def blockingJob(pipeline, order, name):
+  """A job that blocks like the real pipeline, with a single await in the middle"""
+  async def job():
+    time.sleep(0.05)
+    await asyncio.sleep(0)
+    time.sleep(0.05)
+    order.append(name)
+    return name
+  return lambda: pipeline.run(job())
+
+
+def test_interactive_runs_before_queued_prefetch():
+  order = []
+
+  async def main():
+    scheduler = Scheduler()
+    pipeline = PipelineThread()
+    prefetch = [
+      asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, f"p{i}"), key=f"p{i}"))
+      for i in range(4)
+    ]
+    await asyncio.sleep(0.02)
+
+    # the server loop stays free while p0 runs
+    assert scheduler.stats()["running"] == 1
+
+    interactive = scheduler.run("interactive", blockingJob(pipeline, order, "interactive"), key="i")
+    await asyncio.gather(*prefetch, interactive)
+
+  asyncio.run(main())
+  assert order == ["p0", "interactive", "p1", "p2", "p3"]
+
+
+def test_same_key_is_shared_and_promoted():
+  order = []
+
+  async def main():
+    scheduler = Scheduler()
+    pipeline = PipelineThread()
+    prefetch = [
+      asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, f"p{i}"), key=f"p{i}"))
+      for i in range(3)
+    ]
+    await asyncio.sleep(0.02)
+
+    result = await scheduler.run("interactive", blockingJob(pipeline, order, "duplicate"), key="p2")
+    await asyncio.gather(*prefetch)
+
+    stats = scheduler.stats()["queues"]["interactive"]
+    assert stats["shared"] == 1 and stats["promoted"] == 1
+    return result
+
+  assert asyncio.run(main()) == "p2"
+  assert order == ["p0", "p2", "p1"]
+
+
+def test_cancelled_request_is_dropped_from_queue():
+  order = []
+
+  async def main():
+    scheduler = Scheduler()
+    pipeline = PipelineThread()
+    first = asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, "p0"), key="p0"))
+    second = asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, "p1"), key="p1"))
+    await asyncio.sleep(0.02)
+
+    second.cancel()
+    await first
+    with pytest.raises(asyncio.CancelledError):
+      await second
+    return scheduler.stats()["queues"]["prefetch"]
+
+  stats = asyncio.run(main())
+  assert order == ["p0"]
+  assert stats["cancelled"] == 1
+
+
+def test_full_queue_is_rejected():
+  async def main():
+    scheduler = Scheduler(maxQueued={"prefetch": 1})
+    pipeline = PipelineThread()
+    order = []
+    running = asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, "p0"), key="p0"))
+    queued = asyncio.create_task(scheduler.run("prefetch", blockingJob(pipeline, order, "p1"), key="p1"))
+    await asyncio.sleep(0.02)
+
+    with pytest.raises(QueueFull):
+      await scheduler.run("prefetch", blockingJob(pipeline, order, "p2"), key="p2")
+    await asyncio.gather(running, queued)
+
+  asyncio.run(main())
@@ -0,0 +1,95 @@
+import gzip
+import json
+import pytest
+
+# snapshot.py imports redis for its type hints
+pytest.importorskip("redis")
+
+from snapshot import exportCache, importCache
+from fakes import FakeRedis
+
+
+def makeCache():
+  return FakeRedis({
+    "boxes:a": [[[[0, 0], [1, 0], [1, 1], [0, 1]], 0.9]],
+    "readText:a0": "ねこ",
+    "translate:h1": ["cat"],
+    "translate:local-model-h2": ["dog"],
+    "other:x": "not a cache section",
+  })
+
+
+def test_round_trip(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+
+  exported = exportCache(makeCache(), snapshot, batchSize=1)
+  assert exported == {"boxes": 1, "readText": 1, "translate": 2}
+
+  target = FakeRedis()
+  imported = importCache(target, snapshot, batchSize=2)
+  assert imported == exported
+  assert target.store == {key: value for key, value in makeCache().store.items() if not key.startswith("other:")}
+
+
+def test_export_section_filter(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+
+  assert exportCache(makeCache(), snapshot, sections=["translate"]) == {"translate": 2}
+
+  with gzip.open(snapshot, "rt", encoding="utf-8") as f:
+    header = json.loads(f.readline())
+    keys = [json.loads(line)["k"] for line in f]
+  assert header["sections"] == ["translate"]
+  assert sorted(keys) == ["translate:h1", "translate:local-model-h2"]
+
+
+def test_import_section_filter(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+  exportCache(makeCache(), snapshot)
+
+  target = FakeRedis()
+  assert importCache(target, snapshot, sections=["boxes", "readText"]) == {"boxes": 1, "readText": 1}
+  assert sorted(target.store) == ["boxes:a", "readText:a0"]
+
+
+def test_import_keeps_existing_keys_unless_overwrite(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+  exportCache(makeCache(), snapshot)
+
+  target = FakeRedis({"translate:h1": ["kitten"]})
+  assert importCache(target, snapshot)["translate"] == 1
+  assert target.store["translate:h1"] == ["kitten"]
+
+  assert importCache(target, snapshot, overwrite=True)["translate"] == 2
+  assert target.store["translate:h1"] == ["cat"]
+
+
+@pytest.mark.parametrize("content", [
+  b"plain text, not gzip",
+  gzip.compress(b"[1, 2, 3]\n"),
+  gzip.compress(b"not json\n"),
+  gzip.compress(b'{"format": "something-else", "version": 1}\n'),
+  gzip.compress(b""),
+])
+def test_import_rejects_non_snapshots(tmp_path, content):
+  snapshot = tmp_path / "cache.jsonl.gz"
+  snapshot.write_bytes(content)
+
+  with pytest.raises(ValueError, match="not a cache snapshot"):
+    importCache(FakeRedis(), snapshot)
+
+
+def test_import_rejects_other_versions(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+  snapshot.write_bytes(gzip.compress(b'{"format": "cookie-translate-cache", "version": 99}\n'))
+
+  with pytest.raises(ValueError, match="Unsupported snapshot version"):
+    importCache(FakeRedis(), snapshot)
+
+
+def test_import_rejects_broken_entries(tmp_path):
+  snapshot = tmp_path / "cache.jsonl.gz"
+  snapshot.write_bytes(gzip.compress(b'{"format": "cookie-translate-cache", "version": 1}\n[]\n'))
+
+  with pytest.raises(ValueError, match="broken entry"):
+    importCache(FakeRedis(), snapshot)
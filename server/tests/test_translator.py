@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import json
+import pytest
+
+# translator.py imports the OCR models at module level
+pytest.importorskip("manga_ocr")
+pytest.importorskip("easyocr")
+
+from backends import TranslationBackend
+from translator import CookieTranslator
+from fakes import FakeRedis
+
+
+class FakeBackend(TranslationBackend):
+  name = "fake"
+
+  def __init__(self):
+    self.calls = []
+
+  async def translateBulk(self, untranslated):
+    self.calls.append(list(untranslated))
+    return [text.upper() for text in untranslated]
+
+
+def makeTranslator(backend, redisCache=None):
+  # Skip __init__ so no models are loaded, the sub images are read by a fake OCR
+  translator = CookieTranslator.__new__(CookieTranslator)
+  translator.debug = False
+  translator.backend = backend
+  translator.mocr = lambda image: image
+  translator._CookieTranslator__redisCache = redisCache
+  return translator
+
+
+def extractText(translator, subImages):
+  return asyncio.run(translator._CookieTranslator__extractText(subImages, [], "hash"))
+
+
+def test_extract_text_uses_backend():
+  backend = FakeBackend()
+  texts, extractCached, translateCached = extractText(makeTranslator(backend), ["a", "b"])
+
+  assert texts == ["A", "B"]
+  assert backend.calls == [["a", "b"]]
+  assert not extractCached and not translateCached
+
+
+def test_extract_text_caches_with_backend_prefix():
+  backend = FakeBackend()
+  cache = FakeRedis()
+  translator = makeTranslator(backend, cache)
+
+  extractText(translator, ["a", "b"])
+
+  untranslatedHash = hashlib.sha256(json.dumps(["a", "b"]).encode()).hexdigest()
+  assert cache.store[f"translate:fake-{untranslatedHash}"] == ["A", "B"]
+
+  texts, extractCached, translateCached = extractText(translator, ["a", "b"])
+  assert texts == ["A", "B"]
+  assert extractCached and translateCached
+  assert len(backend.calls) == 1
+
+
+class FakeReader():
+  """Stands in for easyocr.Reader, always finds the same boxes"""
+
+  def __init__(self, boxes):
+    self.boxes = boxes
+
+  def readtext(self, image, **kwargs):
+    return [(coords, "", 0.9) for coords in self.boxes]
+
+
+def test_overlay_returns_boxes_without_drawing():
+  from PIL import Image, ImageDraw
+
+  image = Image.new("RGB", (200, 100), "white")
+  ImageDraw.Draw(image).rectangle((100, 50, 150, 90), fill="black")
+  before = image.tobytes()
+
+  translator = makeTranslator(FakeBackend())
+  translator.reader = FakeReader([
+    [[10, 10], [60, 10], [60, 40], [10, 40]],
+    [[100, 50], [150, 50], [150, 90], [100, 90]],
+  ])
+  # "reads" light boxes and dark boxes differently so the order can be checked
+  translator.mocr = lambda subImage: "light" if subImage.getpixel((0, 0)) == (255, 255, 255) else "dark"
+
+  overlay = asyncio.run(translator.overlay(image))
+
+  assert overlay == [
+    {"box": [10, 10, 60, 40], "text": "LIGHT", "fill": "black", "background": "#ffffff"},
+    {"box": [100, 50, 150, 90], "text": "DARK", "fill": "white", "background": "#000000"},
+  ]
+  assert image.tobytes() == before
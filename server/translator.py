@@ -1,6 +1,6 @@
 from manga_ocr import MangaOcr
 import easyocr
-from googletrans import Translator
+from backends import TranslationBackend, GoogleBackend
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 from collections.abc import Callable, Sequence
 import json
@@ -13,14 +13,14 @@ import warnings
 
 class CookieTranslator():
   
-  def __init__(self, redisCache=None, debug=False, fontSize=25):
+  def __init__(self, redisCache=None, debug=False, fontSize=25, backend: TranslationBackend | None = None):
     # print("Loading Models...")
     
     logger.disable("manga_ocr.ocr") # Disable ugly logger output
     
     self.reader = easyocr.Reader(['ja'])
     self.mocr = MangaOcr()
-    self.translator = Translator()
+    self.backend: TranslationBackend = backend or GoogleBackend()
     self.debug = debug
     
     self.__redisCache: redis.Redis | None = redisCache
@@ -186,7 +186,8 @@ class CookieTranslator():
       
       size = (*coords[0], *coords[2])
       
-      subImages.append(image.copy().crop(size))
+      # crop already returns a new image, no need to copy the whole page first
+      subImages.append(image.crop(size))
     
     return subImages
   
@@ -194,10 +195,10 @@ class CookieTranslator():
     return self.mocr(image)
   
   async def __translate(self, untranslated: str):
-    return (await self.translator.translate(untranslated)).text
+    return (await self.backend.translateBulk([untranslated]))[0]
   
   async def __translateBulk(self, untranslated: list[str]):
-    return [t.text for t in (await self.translator.translate(untranslated))]
+    return await self.backend.translateBulk(untranslated)
   
   async def __extractText(self, subImages: list[Image.Image], boxes: list, imageHash: str):
     texts = []
@@ -222,7 +223,7 @@ class CookieTranslator():
     untranslated_hash = hashlib.sha256(json.dumps(untranslated).encode()).hexdigest()
     
     
-    texts, translateCached = await self.__asyncCacheHelper("translate", untranslated_hash, self.__translateBulk, [untranslated])
+    texts, translateCached = await self.__asyncCacheHelper("translate", self.backend.cachePrefix + untranslated_hash, self.__translateBulk, [untranslated])
     
     # translated = await self.__asyncCacheHelper("translate", untranslated, self.__translate, [untranslated])
     # texts.append(translated)
@@ -265,6 +266,25 @@ class CookieTranslator():
       
     return workingText
  
+  def __getColors(self, subImage: Image.Image):
+    """Returns the text colour that contrasts with the box and the box's average colour as hex"""
+    np_img = np.array(subImage.convert("RGB"))
+
+    avg_r = int(np.mean(np_img[:, :, 0]))
+    avg_g = int(np.mean(np_img[:, :, 1]))
+    avg_b = int(np.mean(np_img[:, :, 2]))
+    
+    avg = avg_r + avg_g + avg_b
+    
+    if avg > 382.5:
+      # Is light color
+      textFill = "black"
+    else:
+      # Is dark color
+      textFill = "white"
+    
+    return textFill, f"#{avg_r:02x}{avg_g:02x}{avg_b:02x}"
+ 
   def __writeText(self, draw: ImageDraw.ImageDraw, texts: Sequence[str], boxes: list, fontFile: str, subImages: list[Image.Image]):
     fontSize = self.fontSize #? Font Size should be rather small
     font = ImageFont.truetype(fontFile, fontSize)
@@ -277,23 +297,7 @@ class CookieTranslator():
       
       text = self.__addLineBreaks(text, boxWidth, font)
             
-      img = subImages[i]
-      img = img.convert("RGB")
-
-      np_img = np.array(img)
-
-      avg_r = int(np.mean(np_img[:, :, 0]))
-      avg_g = int(np.mean(np_img[:, :, 1]))
-      avg_b = int(np.mean(np_img[:, :, 2]))
-      
-      avg = avg_r + avg_g + avg_b
-      
-      if avg > 382.5:
-        # Is light color
-        textFill = "black"
-      else:
-        # Is dark color
-        textFill = "white"
+      textFill, _ = self.__getColors(subImages[i])
 
       draw.text(
         (coords[0][0] + round(boxWidth/2), coords[0][1] + round(boxHeight/2)), 
@@ -314,9 +318,10 @@ class CookieTranslator():
       draw.rectangle((coords[0], coords[2]), None, "red")
       draw.text((coords[0][0], coords[2][1] - 10), str(i), font=font, fill="green")
   
-  async def expandedRun(self, image: Image.Image) -> dict:
+  async def expandedRun(self, image: Image.Image, render=True) -> dict:
+    """Runs the whole pipeline, with render=False the image is left untouched and only
+    the boxes, translations and colours are returned (for clients drawing their own overlay)"""
     imageHash = hashlib.sha256(image.tobytes()).hexdigest()
-    draw = ImageDraw.Draw(image)
     font = "./NotoSansJP-Regular.ttf"
     
     if self.debug:
@@ -343,6 +348,37 @@ class CookieTranslator():
     texts, extractCached, translateCached = await self.__extractText(subImages, boxes, imageHash+boxHash)
     texts = [str(text) for text in (texts or [])]
     
+    cacheInfo = {
+      "all": boxesCached and extractCached and translateCached,
+      "boxes": boxesCached,
+      "extract": extractCached,
+      "translate": translateCached
+    }
+    
+    if not render:
+      overlay = []
+      for i, text in enumerate(texts):
+        coords, _ = boxes[i]
+        textFill, background = self.__getColors(subImages[i])
+        overlay.append({
+          "box": [*coords[0], *coords[2]],
+          "text": text,
+          "fill": textFill,
+          "background": background,
+        })
+      
+      for subImage in subImages:
+        subImage.close()
+      
+      return {
+        "image": image,
+        "bb": boxes,
+        "overlay": overlay,
+        "cacheInfo": cacheInfo
+      }
+    
+    draw = ImageDraw.Draw(image)
+    
     if self.debug:
       print("Drawing Backgrounds")
     self.__pasteBackground(image, subImages, boxes)
@@ -355,16 +391,13 @@ class CookieTranslator():
     if self.debug:
       self.__addDebugInfo(draw, boxes, font)
     
+    for subImage in subImages:
+      subImage.close()
 
     return {
       "image": image,
       "bb": boxes,
-      "cacheInfo": {
-        "all": boxesCached and extractCached and translateCached,
-        "boxes": boxesCached,
-        "extract": extractCached,
-        "translate": translateCached
-      }
+      "cacheInfo": cacheInfo
     }
     
   
@@ -373,6 +406,9 @@ class CookieTranslator():
   async def run(self, image: Image.Image) -> Image.Image:
     return (await self.expandedRun(image=image))["image"]
 
+  async def overlay(self, image: Image.Image) -> list[dict]:
+    return (await self.expandedRun(image=image, render=False))["overlay"]
+
   async def test(self, image, outPath):
     out = await self.run(image)
     out.save(outPath, "PNG")